@@ -1,29 +1,17 @@
+import asyncio
 import pandas as pd
-import sqlite3
+from database import close_db, export_diary
 
-def load_data(db_path="emotion_data.db"):
-    conn = sqlite3.connect(db_path)
-    df = pd.read_sql("""
-        SELECT 
-            e.timestamp,
-            e.user_id,
-            u.name,
-            u.gender,
-            e.hunger_before,
-            e.satiety_after,
-            e.emotion,
-            e.sleep_hours,
-            e.location,
-            e.company,
-            e.phone,
-            e.cycle_day,
-            e.binge_eating
-        FROM entries e
-        LEFT JOIN users u ON u.user_id = e.user_id
-        ORDER BY e.timestamp DESC
-    """, conn)
-    conn.close()
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
+async def _fetch_diary():
+    try:
+        return await export_diary()
+    finally:
+        await close_db()
+
+def load_data():
+    df = pd.DataFrame(asyncio.run(_fetch_diary()))
+    if not df.empty:
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
     return df
 
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+# emotion_bot/benchmark.py
+# Замер запросов database.py и выгрузок на локальной базе с синтетическими данными
+#
+# Пример:
+#   BENCH_DATABASE_URL=postgresql://postgres@localhost/bench \
+#   python emotion_bot/benchmark.py --save-baseline
+#
+# Планы EXPLAIN (ANALYZE, BUFFERS) сохраняются в --plans-dir. Если сохранен
+# базовый замер, медиана каждого запроса сравнивается с ним; при регрессии
+# скрипт завершается с кодом 1.
+
+import argparse
+import asyncio
+import json
+import os
+import logging
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from generate_data import use_bench_database
+from vocabulary import (
+    EMOTIONS, LOCATIONS, COMPANY_OPTIONS, PHONE_OPTIONS, BINGE_OPTIONS
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Запись, которую вставляют замеры путей записи
+BENCH_ENTRY = {
+    "hunger_before": 7,
+    "satiety_after": 4,
+    "emotion": EMOTIONS[0],
+    "sleep_hours": 7.0,
+    "location": LOCATIONS[0],
+    "company": COMPANY_OPTIONS[0],
+    "phone": PHONE_OPTIONS[0],
+    "binge_eating": BINGE_OPTIONS[0],
+}
+BENCH_CYCLE_DAY = 14
+
+def entry_params(user_id):
+    """Параметры INSERT_ENTRY_SQL для BENCH_ENTRY"""
+    return (user_id, *BENCH_ENTRY.values())
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк запросов и выгрузок database.py")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="адрес локальной базы (по умолчанию BENCH_DATABASE_URL)")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="повторов для запросов по одному пользователю")
+    parser.add_argument("--scan-iterations", type=int, default=3,
+                        help="повторов для полных выгрузок")
+    parser.add_argument("--baseline", default=os.path.join(BASE_DIR, "bench_baseline.json"),
+                        help="файл с базовым замером")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="сохранить текущий замер как базовый")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимое замедление медианы относительно базового замера")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="замедления меньше этого значения считаются шумом")
+    parser.add_argument("--plans-dir", default=os.path.join(BASE_DIR, "bench_plans"),
+                        help="куда сохранять планы EXPLAIN")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def build_cases(database):
+    """(название, вызов функции, SQL, параметры для EXPLAIN,
+    запрос по одному пользователю, пул, в котором выполняется запрос)
+
+    Параметры для EXPLAIN строятся по словарю пользователей худшего случая:
+    "entries" — больше всего записей, "cycle_days" — больше всего дней цикла.
+    """
+    return [
+        ("get_user", lambda uid: database.get_user(uid),
+         database.GET_USER_SQL, lambda users: (users["entries"],), True, database.INTERACTIVE),
+        ("get_user_entries", lambda uid: database.get_user_entries(uid),
+         database.USER_ENTRIES_SQL, lambda users: (users["entries"], 10), True, database.INTERACTIVE),
+        ("get_last_cycle_day", lambda uid: database.get_last_cycle_day(uid),
+         database.LAST_CYCLE_DAY_SQL, lambda users: (users["cycle_days"],), True, database.INTERACTIVE),
+        ("insert_entry", lambda uid: database.insert_entry(uid, BENCH_ENTRY),
+         database.INSERT_ENTRY_SQL, lambda users: entry_params(users["entries"]),
+         True, database.INTERACTIVE),
+        ("insert_entry_with_cycle_day",
+         lambda uid: database.insert_entry_with_cycle_day(uid, BENCH_ENTRY, BENCH_CYCLE_DAY),
+         database.INSERT_ENTRY_WITH_CYCLE_DAY_SQL,
+         lambda users: (*entry_params(users["cycle_days"]), BENCH_CYCLE_DAY),
+         True, database.INTERACTIVE),
+        ("save_cycle_day", lambda uid: database.save_cycle_day(uid, BENCH_CYCLE_DAY),
+         database.SAVE_CYCLE_DAY_SQL, lambda users: (users["cycle_days"], BENCH_CYCLE_DAY),
+         True, database.INTERACTIVE),
+        ("reminder_user_scan", lambda _: database.get_all_user_ids(),
+         database.ALL_USER_IDS_SQL, lambda _: (), False, database.ANALYTICS),
+        ("export_users", lambda _: database.export_users(),
+         database.EXPORT_USERS_SQL, lambda _: (), False, database.ANALYTICS),
+        ("export_entries", lambda _: database.export_entries(),
+         database.EXPORT_ENTRIES_SQL, lambda _: (), False, database.ANALYTICS),
+        ("export_diary", lambda _: database.export_diary(),
+         database.EXPORT_DIARY_SQL, lambda _: (), False, database.ANALYTICS),
+    ]
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def time_case(call, user_ids):
+    await call(user_ids[0])  # прогрев
+    samples = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        await call(user_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(percentile(samples, 0.5), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+async def explain(conn, name, sql, params, plans_dir):
+    """Снимает EXPLAIN (ANALYZE, BUFFERS) и возвращает время выполнения по плану.
+
+    ANALYZE выполняет запрос, поэтому он идет в транзакции, которая откатывается.
+    """
+    transaction = conn.transaction()
+    await transaction.start()
+    try:
+        rows = await conn.fetch("EXPLAIN (ANALYZE, BUFFERS) " + sql, *params)
+    finally:
+        await transaction.rollback()
+    plan = "\n".join(row["QUERY PLAN"] for row in rows)
+    with open(os.path.join(plans_dir, f"{name}.txt"), "w") as f:
+        f.write(plan + "\n")
+    for line in reversed(plan.splitlines()):
+        if line.startswith("Execution Time:"):
+            return float(line.split()[2])
+    return None
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Возвращает список регрессий относительно базового замера"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("queries", {}).get(name)
+        if not base:
+            continue
+        delta = result["p50_ms"] - base["p50_ms"]
+        if delta > min_delta_ms and result["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {base['p50_ms']}ms -> {result['p50_ms']}ms")
+    return regressions
+
+async def main():
+    args = parse_args()
+    use_bench_database(args.dsn)
+    import database
+
+    # Логи каждого запроса искажают замеры
+    logging.getLogger("database").setLevel(logging.WARNING)
+    os.makedirs(args.plans_dir, exist_ok=True)
+
+    await database.init_db()
+    try:
+        pool = await database.get_pool()
+        async with pool.acquire() as conn:
+            counts = {
+                table: await conn.fetchval(f"SELECT COUNT(*) FROM {table}")
+                for table in ("users", "entries", "cycle_days")
+            }
+            # Для EXPLAIN берем худший случай: пользователя с наибольшим числом строк
+            worst_users = {
+                table: await conn.fetchval(f"""
+                    SELECT user_id FROM {table}
+                    GROUP BY user_id
+                    ORDER BY COUNT(*) DESC
+                    LIMIT 1
+                """)
+                for table in ("entries", "cycle_days")
+            }
+            # Строки, вставленные замерами записи, удаляются после каждого замера
+            max_ids = {
+                table: await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                for table in ("entries", "cycle_days")
+            }
+            await conn.execute("SELECT setseed($1)", 1 / (abs(args.seed) + 1))
+            sample = [row["id"] for row in await conn.fetch(
+                "SELECT id FROM users ORDER BY random() LIMIT $1", args.iterations
+            )]
+        if None in worst_users.values() or not sample:
+            logger.error("Database is empty, run generate_data.py first")
+            sys.exit(1)
+        logger.info(f"Rows: {counts}")
+
+        results = {}
+        for name, call, sql, params, per_user, pool_name in build_cases(database):
+            user_ids = sample if per_user else [worst_users["entries"]] * args.scan_iterations
+            try:
+                result = await time_case(call, user_ids)
+                case_pool = await database.get_pool(pool_name)
+                async with case_pool.acquire() as conn:
+                    result["plan_ms"] = await explain(conn, name, sql, params(worst_users), args.plans_dir)
+            finally:
+                # Убираем строки после каждого замера, чтобы они не попали в следующие
+                async with pool.acquire() as conn:
+                    for table, max_id in max_ids.items():
+                        await conn.execute(f"DELETE FROM {table} WHERE id > $1", max_id)
+            results[name] = result
+            logger.info(f"{name}: {result}")
+        pool_stats = database.get_pool_stats()
+    finally:
+        await database.close_db()
+
+    print(f"\n{'query':<30}{'p50, ms':>12}{'p95, ms':>12}{'max, ms':>12}{'plan, ms':>12}")
+    for name, result in results.items():
+        print(f"{name:<30}{result['p50_ms']:>12}{result['p95_ms']:>12}"
+              f"{result['max_ms']:>12}{result['plan_ms'] or '-':>12}")
+    print("\nPools:")
+    for name, stats in pool_stats.items():
+        print(f"  {name}: {stats}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"rows": counts, "queries": results}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline found, run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("rows") != counts:
+        print(f"\nWarning: baseline was recorded on {baseline.get('rows')}, current data is {counts}")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+if __name__ == "__main__":
+    asyncio.run(main())
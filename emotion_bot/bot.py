@@ -2,18 +2,24 @@
 # Last updated: 2025-05-27 - Added detailed emotion descriptions
 
 import asyncio
-from aiogram import Bot, Dispatcher, types
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram import Bot, Dispatcher, F, types
+from aiogram.types import (
+    ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+)
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from database import (
     init_db, insert_entry, get_user, save_user, close_db,
-    get_last_cycle_day, save_cycle_day, get_pool
+    get_last_cycle_day, save_cycle_day, get_all_user_ids, insert_entry_with_cycle_day
+)
+from vocabulary import (
+    EMOTIONS, LOCATIONS, COMPANY_OPTIONS, PHONE_OPTIONS, BINGE_OPTIONS
 )
 from dotenv import load_dotenv
 import os
+import re
 import logging
 import sys
 from datetime import datetime, timedelta
@@ -49,6 +55,152 @@ class DiaryForm(StatesGroup):
     cycle_day = State()
     binge_eating = State()
 
+class InlineDiaryForm(StatesGroup):
+    # Весь дневник в одном сообщении: текущий шаг хранится в данных состояния
+    active = State()
+
+MEAL_BUTTON = "📝 Записать приём пищи"
+
+CYCLE_DAY_PROMPT = (
+    "Какой сегодня день цикла?\n\n"
+    "📝 Введи число от 1 до 40\n"
+    "(В зависимости от длины твоего цикла эта цифра может варьироваться)\n\n"
+    "• 1-5 день: менструация\n"
+    "• 6-14 день: фолликулярная фаза\n"
+    "• 15-28 день: лютеиновая фаза\n"
+    "• 29-40 день: возможна задержка"
+)
+BINGE_PROMPT = (
+    "Как ты оцениваешь этот приём пищи?\n\n"
+    "• Обычный приём пищи — ты съел(а) столько, сколько планировал(а)\n"
+    "• Лёгкое переедание — съел(а) больше обычного, но без сильного дискомфорта\n"
+    "• Сильное переедание — съел(а) значительно больше, есть дискомфорт\n"
+    "• Срыв — потеря контроля над количеством еды\n"
+    "• Не уверен(а) — сложно оценить"
+)
+
+def _reply_kb(labels, row_width):
+    """Клавиатура из подписей, разбитых на ряды по row_width кнопок"""
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=label) for label in labels[i:i + row_width]]
+            for i in range(0, len(labels), row_width)
+        ],
+        resize_keyboard=True
+    )
+
+# Клавиатуры собираются один раз при запуске и переиспользуются в обработчиках
+MEAL_KB = _reply_kb([MEAL_BUTTON], 1)
+GENDER_KB = _reply_kb(["Мужской", "Женский"], 2)
+SCALE_KB = _reply_kb([str(i) for i in range(1, 11)], 5)
+SLEEP_KB = _reply_kb([str(i) for i in range(1, 13)], 6)
+EMOTION_KB = _reply_kb(EMOTIONS, 1)
+LOCATION_KB = _reply_kb(LOCATIONS, 2)
+COMPANY_KB = _reply_kb(COMPANY_OPTIONS, 2)
+PHONE_KB = _reply_kb(PHONE_OPTIONS, 2)
+BINGE_KB = ReplyKeyboardMarkup(
+    keyboard=_reply_kb(BINGE_OPTIONS, 2).keyboard + [[KeyboardButton(text=MEAL_BUTTON)]],
+    resize_keyboard=True
+)
+
+# Шаги inline-режима: (поле записи, вопрос, значения, кнопок в ряду).
+# В callback_data передаются только индексы шага и варианта ("d:<шаг>:<вариант>"),
+# поэтому длинные подписи не упираются в лимит Telegram в 64 байта.
+INLINE_STEPS = [
+    ("hunger_before", "от 1 до 10, какой был голод перед едой?", list(range(1, 11)), 5),
+    ("satiety_after", "Какой уровень сытости после?", list(range(1, 11)), 5),
+    ("emotion", "Какую эмоцию ты испытывал(а)? Выбери наиболее подходящее описание своего состояния:", EMOTIONS, 1),
+    ("sleep_hours", "Сколько часов ты спал(а)?", [float(i) for i in range(1, 13)], 6),
+    ("location", "Где ты ел(а)? Выбери наиболее подходящий вариант:", LOCATIONS, 2),
+    ("company", "Ты ел(а) один/одна или с кем-то?", COMPANY_OPTIONS, 2),
+    ("phone", "Ты ел(а) с телефоном или без?", PHONE_OPTIONS, 2),
+    ("cycle_day", CYCLE_DAY_PROMPT, list(range(1, 41)), 8),
+    ("binge_eating", BINGE_PROMPT, BINGE_OPTIONS, 1),
+]
+CYCLE_DAY_STEP = next(i for i, step in enumerate(INLINE_STEPS) if step[0] == "cycle_day")
+
+def _inline_label(value):
+    return str(int(value)) if isinstance(value, float) else str(value)
+
+def _inline_kb(step, values, row_width):
+    """Inline-клавиатура шага; callback_data содержит индексы шага и варианта"""
+    buttons = [
+        InlineKeyboardButton(text=_inline_label(value), callback_data=f"d:{step}:{i}")
+        for i, value in enumerate(values)
+    ]
+    return InlineKeyboardMarkup(
+        inline_keyboard=[buttons[i:i + row_width] for i in range(0, len(buttons), row_width)]
+    )
+
+INLINE_KEYBOARDS = [
+    _inline_kb(step, values, row_width)
+    for step, (_, _, values, row_width) in enumerate(INLINE_STEPS)
+]
+
+# Поля быстрой записи (/q), которые заполняются словами, и их словари
+QUICK_FIELDS = {
+    "emotion": EMOTIONS,
+    "location": LOCATIONS,
+    "company": COMPANY_OPTIONS,
+    "phone": PHONE_OPTIONS,
+    "binge_eating": BINGE_OPTIONS,
+}
+# Дополнительные синонимы к подписям кнопок; сами подписи и их части
+# через "/" распознаются автоматически
+QUICK_SYNONYMS = {
+    "😐 Нейтрально / никаких ярких эмоций": ["норм"],
+    "🏠 Дома": ["дом"],
+    "🚗 В машине": ["машина"],
+    "🏢 В гостях": ["гости"],
+    "🌳 На природе": ["природа"],
+    "с кем-то": ["вместе", "компания"],
+    "с телефоном": ["телефон"],
+    "✅ Нет, обычный приём пищи": ["нет", "обычно", "обычный", "обычный приём пищи"],
+    "⚠️ Лёгкое переедание": ["лёгкое"],
+    "❗ Сильное переедание": ["сильное"],
+    "🔥 Срыв/компульсивное переедание": ["компульсивное"],
+    "🤔 Не уверен(а)": ["не уверен", "не уверена"],
+}
+
+def _quick_normalize(text):
+    """Нижний регистр, "ё" -> "е", без эмодзи и лишних пробелов"""
+    text = "".join(ch for ch in text.lower().replace("ё", "е") if ch.isalnum() or ch in " /-(),.")
+    return " ".join(text.split())
+
+def _build_quick_lookup():
+    """Таблица синоним -> (поле, подпись кнопки), собранная из словарей vocabulary.py"""
+    lookup = {}
+    for field, options in QUICK_FIELDS.items():
+        for label in options:
+            full = _quick_normalize(label)
+            aliases = [full] + [part.strip() for part in full.split("/")]
+            aliases += [_quick_normalize(alias) for alias in QUICK_SYNONYMS.get(label, [])]
+            for alias in aliases:
+                if lookup.get(alias, (field, label)) != (field, label):
+                    raise ValueError(f"Quick-log alias '{alias}' is ambiguous")
+                lookup[alias] = (field, label)
+    unknown = set(QUICK_SYNONYMS) - {label for options in QUICK_FIELDS.values() for label in options}
+    if unknown:
+        raise ValueError(f"Quick-log synonyms for unknown labels: {unknown}")
+    return lookup
+
+QUICK_LOOKUP = _build_quick_lookup()
+# Многословные синонимы идут первыми, чтобы "без телефона" не разбивалось на два слова
+QUICK_TOKEN_RE = re.compile(
+    "|".join(
+        re.escape(alias) + r"(?!\S)"
+        for alias in sorted((a for a in QUICK_LOOKUP if " " in a), key=len, reverse=True)
+    ) + r"|\S+"
+)
+QUICK_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+# Числа в быстрой записи идут по порядку: голод, сытость, сон, день цикла
+QUICK_NUMBER_FIELDS = [
+    ("hunger_before", int, 1, 10),
+    ("satiety_after", int, 1, 10),
+    ("sleep_hours", float, 0, 24),
+    ("cycle_day", int, 1, 40),
+]
+
 @dp.message(Command("start"))
 async def start(message: types.Message, state: FSMContext):
     logger.info(f"Start command received from user {message.from_user.id}")
@@ -57,11 +209,9 @@ async def start(message: types.Message, state: FSMContext):
         name, _ = user
         await message.answer(
             f"Снова здравствуй, {name}!\n\n"
-            "Нажми на кнопку ниже, чтобы записать приём пищи 👇",
-            reply_markup=ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text="📝 Записать приём пищи")]],
-                resize_keyboard=True
-            )
+            "Нажми на кнопку ниже, чтобы записать приём пищи 👇\n"
+            "Или отправь /imeal, чтобы заполнить дневник кнопками в одном сообщении",
+            reply_markup=MEAL_KB
         )
     else:
         await state.set_state(DiaryForm.name)
@@ -79,18 +229,90 @@ async def start(message: types.Message, state: FSMContext):
             "📥 Введи своё имя в ответ на это сообщение 👇"
         )
 
-@dp.message(lambda message: message.text == "📝 Записать приём пищи")
+# Команды регистрируются до обработчиков DiaryForm, иначе их перехватит незавершенная анкета
+@dp.message(Command("imeal"))
+async def inline_meal(message: types.Message, state: FSMContext):
+    """Запись приёма пищи через inline-кнопки: одно сообщение редактируется на каждом шаге"""
+    user = await get_user(message.from_user.id)
+    if not user:
+        await message.answer("Давай сначала познакомимся! Как тебя зовут?")
+        await state.set_state(DiaryForm.name)
+        return
+    name, gender = user
+    await state.set_state(InlineDiaryForm.active)
+    # Имя сохраняем в состоянии, чтобы в конце не запрашивать пользователя повторно
+    await state.set_data({"name": name, "gender": gender, "step": 0})
+    sent = await message.answer(f"{name}, {INLINE_STEPS[0][1]}", reply_markup=INLINE_KEYBOARDS[0])
+    # Принимаем нажатия только в этом сообщении, а не в старых сообщениях /imeal
+    await state.update_data(message_id=sent.message_id)
+
+def parse_quick_entry(text):
+    """Разбор быстрой записи вида "7 4 стресс 6 дом один телефон срыв".
+
+    Возвращает словарь с полями записи или None, если запись неоднозначна:
+    встретилось незнакомое слово, число вне диапазона или поле указано дважды.
+    """
+    data = {}
+    numbers = 0
+    for token in QUICK_TOKEN_RE.findall(_quick_normalize(text)):
+        if QUICK_NUMBER_RE.fullmatch(token):
+            if numbers == len(QUICK_NUMBER_FIELDS):
+                return None
+            field, cast, low, high = QUICK_NUMBER_FIELDS[numbers]
+            number = float(token.replace(",", "."))
+            if not low <= number <= high or (cast is int and not number.is_integer()):
+                return None
+            data[field] = cast(number)
+            numbers += 1
+        elif token in QUICK_LOOKUP:
+            field, value = QUICK_LOOKUP[token]
+            if field in data:
+                return None
+            data[field] = value
+        else:
+            return None
+    return data
+
+@dp.message(Command("q"))
+async def quick_meal(message: types.Message, state: FSMContext, command: CommandObject):
+    """Запись приёма пищи одним сообщением; при неоднозначности — пошаговый режим"""
+    user = await get_user(message.from_user.id)
+    data = parse_quick_entry(command.args or "")
+    if user and data is not None:
+        name, gender = user
+        required = [field for field, _, _, _ in QUICK_NUMBER_FIELDS[:3]] + list(QUICK_FIELDS)
+        cycle_day = data.pop("cycle_day", None)
+        if gender != "женский" and cycle_day is not None:
+            data = None
+        elif gender == "женский" and cycle_day is None:
+            # День цикла можно не указывать, если он уже был введен сегодня
+            if await get_last_cycle_day(message.from_user.id) is None:
+                data = None
+        if data is not None and all(field in data for field in required):
+            if cycle_day is None:
+                await insert_entry(message.from_user.id, data)
+            else:
+                await insert_entry_with_cycle_day(message.from_user.id, data, cycle_day)
+            await message.answer(f"Спасибо, {name}! Всё записано 🙌", reply_markup=MEAL_KB)
+            await state.clear()
+            return
+    if user:
+        await message.answer(
+            "Не получилось однозначно разобрать запись, давай заполним её по шагам.\n"
+            "Быстрая запись: числа по порядку — голод, сытость, сон и день цикла, "
+            "а также слова для эмоции, места, компании, телефона и оценки, например:\n"
+            "/q 7 4 стресс 6 дом один телефон срыв"
+        )
+    await meal(message, state)
+
+@dp.message(lambda message: message.text == MEAL_BUTTON)
 async def meal_button(message: types.Message, state: FSMContext):
     await meal(message, state)
 
 @dp.message(DiaryForm.name)
 async def process_name(message: types.Message, state: FSMContext):
     await state.update_data(name=message.text)
-    kb = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="Мужской"), KeyboardButton(text="Женский")]],
-        resize_keyboard=True
-    )
-    await message.answer("Выбери пол:", reply_markup=kb)
+    await message.answer("Выбери пол:", reply_markup=GENDER_KB)
     await state.set_state(DiaryForm.gender)
 
 @dp.message(DiaryForm.gender)
@@ -99,14 +321,7 @@ async def gender(message: types.Message, state: FSMContext):
     data = await state.get_data()
     await save_user(message.from_user.id, data["name"], gender)
     await state.update_data(gender=gender)
-    kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=str(i)) for i in range(1, 6)],
-            [KeyboardButton(text=str(i)) for i in range(6, 11)]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer(f"{data['name']}, от 1 до 10, какой был голод перед едой?", reply_markup=kb)
+    await message.answer(f"{data['name']}, от 1 до 10, какой был голод перед едой?", reply_markup=SCALE_KB)
     await state.set_state(DiaryForm.hunger_before)
 
 @dp.message(Command("meal"))
@@ -118,97 +333,43 @@ async def meal(message: types.Message, state: FSMContext):
         return
     name, gender = user
     await state.update_data(gender=gender)
-    kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=str(i)) for i in range(1, 6)],
-            [KeyboardButton(text=str(i)) for i in range(6, 11)]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer(f"{name}, от 1 до 10, какой был голод перед едой?", reply_markup=kb)
+    await message.answer(f"{name}, от 1 до 10, какой был голод перед едой?", reply_markup=SCALE_KB)
     await state.set_state(DiaryForm.hunger_before)
 
 @dp.message(DiaryForm.hunger_before)
 async def hunger_before(message: types.Message, state: FSMContext):
     await state.update_data(hunger_before=int(message.text))
-    kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=str(i)) for i in range(1, 6)],
-            [KeyboardButton(text=str(i)) for i in range(6, 11)]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("Какой уровень сытости после?", reply_markup=kb)
+    await message.answer("Какой уровень сытости после?", reply_markup=SCALE_KB)
     await state.set_state(DiaryForm.satiety_after)
 
 @dp.message(DiaryForm.satiety_after)
 async def satiety_after(message: types.Message, state: FSMContext):
     await state.update_data(satiety_after=int(message.text))
-    emotions = [
-        "😐 Нейтрально / никаких ярких эмоций",
-        "😊 Радость / удовлетворение / спокойствие",
-        "😢 Грусть / разочарование / одиночество",
-        "😠 Злость / раздражение / обида",
-        "😰 Тревога / беспокойство / паника",
-        "😴 Усталость / опустошение / вялость",
-        "😞 Стыд / вина / самокритика",
-        "🤯 Стресс / давление / перегрузка",
-        "🥱 Скука / апатия / безразличие",
-        "😍 Вдохновение / воодушевление / благодарность"
-    ]
-    kb = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text=emotion)] for emotion in emotions],
-        resize_keyboard=True
-    )
-    await message.answer("Какую эмоцию ты испытывал(а)? Выбери наиболее подходящее описание своего состояния:", reply_markup=kb)
+    await message.answer("Какую эмоцию ты испытывал(а)? Выбери наиболее подходящее описание своего состояния:", reply_markup=EMOTION_KB)
     await state.set_state(DiaryForm.emotion)
 
 @dp.message(DiaryForm.emotion)
 async def emotion(message: types.Message, state: FSMContext):
     await state.update_data(emotion=message.text)
-    kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=str(i)) for i in range(1, 7)],
-            [KeyboardButton(text=str(i)) for i in range(7, 13)]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("Сколько часов ты спал(а)?", reply_markup=kb)
+    await message.answer("Сколько часов ты спал(а)?", reply_markup=SLEEP_KB)
     await state.set_state(DiaryForm.sleep_hours)
 
 @dp.message(DiaryForm.sleep_hours)
 async def sleep_hours(message: types.Message, state: FSMContext):
     await state.update_data(sleep_hours=float(message.text))
-    kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🏠 Дома"), KeyboardButton(text="💼 Работа/Учеба")],
-            [KeyboardButton(text="🍽️ Кафе/Ресторан"), KeyboardButton(text="🚶 На ходу")],
-            [KeyboardButton(text="🚗 В машине"), KeyboardButton(text="🏢 В гостях")],
-            [KeyboardButton(text="🌳 На природе"), KeyboardButton(text="📱 Другое")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("Где ты ел(а)? Выбери наиболее подходящий вариант:", reply_markup=kb)
+    await message.answer("Где ты ел(а)? Выбери наиболее подходящий вариант:", reply_markup=LOCATION_KB)
     await state.set_state(DiaryForm.location)
 
 @dp.message(DiaryForm.location)
 async def location(message: types.Message, state: FSMContext):
     await state.update_data(location=message.text)
-    kb = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="один/одна"), KeyboardButton(text="с кем-то")]],
-        resize_keyboard=True
-    )
-    await message.answer("Ты ел(а) один/одна или с кем-то?", reply_markup=kb)
+    await message.answer("Ты ел(а) один/одна или с кем-то?", reply_markup=COMPANY_KB)
     await state.set_state(DiaryForm.company)
 
 @dp.message(DiaryForm.company)
 async def company(message: types.Message, state: FSMContext):
     await state.update_data(company=message.text)
-    kb = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="с телефоном"), KeyboardButton(text="без телефона")]],
-        resize_keyboard=True
-    )
-    await message.answer("Ты ел(а) с телефоном или без?", reply_markup=kb)
+    await message.answer("Ты ел(а) с телефоном или без?", reply_markup=PHONE_KB)
     await state.set_state(DiaryForm.phone)
 
 @dp.message(DiaryForm.phone)
@@ -224,16 +385,7 @@ async def phone(message: types.Message, state: FSMContext):
             await ask_binge(message, state)
         else:
             # Если день цикла еще не был введен, спрашиваем
-            await message.answer(
-                "Какой сегодня день цикла?\n\n"
-                "📝 Введи число от 1 до 40\n"
-                "(В зависимости от длины твоего цикла эта цифра может варьироваться)\n\n"
-                "• 1-5 день: менструация\n"
-                "• 6-14 день: фолликулярная фаза\n"
-                "• 15-28 день: лютеиновая фаза\n"
-                "• 29-40 день: возможна задержка",
-                reply_markup=types.ReplyKeyboardRemove()
-            )
+            await message.answer(CYCLE_DAY_PROMPT, reply_markup=types.ReplyKeyboardRemove())
             await state.set_state(DiaryForm.cycle_day)
     else:
         await ask_binge(message, state)
@@ -247,24 +399,7 @@ async def cycle_day(message: types.Message, state: FSMContext):
     await ask_binge(message, state)
 
 async def ask_binge(message: types.Message, state: FSMContext):
-    kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="✅ Нет, обычный приём пищи"), KeyboardButton(text="⚠️ Лёгкое переедание")],
-            [KeyboardButton(text="❗ Сильное переедание"), KeyboardButton(text="🔥 Срыв/компульсивное переедание")],
-            [KeyboardButton(text="🤔 Не уверен(а)")],
-            [KeyboardButton(text="📝 Записать приём пищи")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer(
-        "Как ты оцениваешь этот приём пищи?\n\n"
-        "• Обычный приём пищи — ты съел(а) столько, сколько планировал(а)\n"
-        "• Лёгкое переедание — съел(а) больше обычного, но без сильного дискомфорта\n"
-        "• Сильное переедание — съел(а) значительно больше, есть дискомфорт\n"
-        "• Срыв — потеря контроля над количеством еды\n"
-        "• Не уверен(а) — сложно оценить",
-        reply_markup=kb
-    )
+    await message.answer(BINGE_PROMPT, reply_markup=BINGE_KB)
     await state.set_state(DiaryForm.binge_eating)
 
 @dp.message(DiaryForm.binge_eating)
@@ -274,39 +409,86 @@ async def binge_eating(message: types.Message, state: FSMContext):
     await insert_entry(message.from_user.id, data)
     user = await get_user(message.from_user.id)
     name = user[0] if user else "Пользователь"
-    await message.answer(
-        f"Спасибо, {name}! Всё записано 🙌",
-        reply_markup=ReplyKeyboardMarkup(
-            keyboard=[[KeyboardButton(text="📝 Записать приём пищи")]],
-            resize_keyboard=True
-        )
-    )
+    await message.answer(f"Спасибо, {name}! Всё записано 🙌", reply_markup=MEAL_KB)
     await state.clear()
 
+@dp.callback_query(InlineDiaryForm.active, F.data.startswith("d:"))
+async def inline_step(callback: types.CallbackQuery, state: FSMContext):
+    _, step, choice = callback.data.split(":")
+    step, choice = int(step), int(choice)
+    data = await state.get_data()
+    if step != data.get("step") or callback.message.message_id != data.get("message_id"):
+        # Нажатие на кнопку уже пройденного шага или другого сообщения
+        await callback.answer()
+        return
+    # Занимаем шаг до обращений к базе: повторное нажатие на ту же кнопку
+    # обрабатывается параллельно и должно отсеяться проверкой выше
+    await state.update_data(step=None)
+
+    saved = False
+    try:
+        field, _, values, _ = INLINE_STEPS[step]
+        value = values[choice]
+        await state.update_data({field: value})
+        if field == "cycle_day":
+            await save_cycle_day(callback.from_user.id, value)
+
+        next_step = step + 1
+        if next_step == CYCLE_DAY_STEP:
+            if data["gender"] != "женский":
+                next_step += 1
+            else:
+                # Если день цикла уже был введен сегодня, используем его
+                cycle_day = await get_last_cycle_day(callback.from_user.id)
+                if cycle_day is not None:
+                    await state.update_data(cycle_day=cycle_day)
+                    next_step += 1
+
+        if next_step == len(INLINE_STEPS):
+            data = await state.get_data()
+            await insert_entry(callback.from_user.id, data)
+            saved = True
+            await state.clear()
+            await callback.message.edit_text(f"Спасибо, {data['name']}! Всё записано 🙌")
+            await callback.answer()
+            return
+
+        await state.update_data(step=next_step)
+        await callback.message.edit_text(INLINE_STEPS[next_step][1], reply_markup=INLINE_KEYBOARDS[next_step])
+        await callback.answer()
+    except Exception as e:
+        # Иначе шаг остался бы занятым и все следующие нажатия молча игнорировались бы
+        logger.error(f"Error in inline diary step for user {callback.from_user.id}: {e}")
+        await state.clear()
+        if saved:
+            await callback.answer("Всё записано 🙌")
+        else:
+            await callback.answer("Не получилось сохранить ответ 😔 Начни запись заново: /imeal", show_alert=True)
+
+@dp.callback_query(F.data.startswith("d:"))
+async def inline_stale(callback: types.CallbackQuery):
+    """Кнопки из старых или завершённых записей"""
+    await callback.answer("Эта запись уже завершена. Начни новую: /imeal")
+
 async def send_daily_reminder():
     """Send daily reminder to all users"""
     logger.info("Sending daily reminders...")
     try:
-        pool = await get_pool()
-        async with pool.acquire() as conn:
-            # Get all unique user IDs
-            users = await conn.fetch("SELECT DISTINCT id FROM users")
-            logger.info(f"Found {len(users)} users to send reminders")
-            for user in users:
-                try:
-                    await bot.send_message(
-                        user['id'],
-                        "Небольшое напоминание 🌿\n\n"
-                        "Если вдруг почувствуешь, что хочется записать, как ты себя сегодня ощущаешь — это может помочь общему процессу. Всё по желанию, никакой спешки и обязательств.\n\n"
-                        "Твоё участие для нас действительно важно. Каждый из нас — часть чего-то большего. Спасибо, что ты уделяешь время и делишься чувствами.",
-                        reply_markup=ReplyKeyboardMarkup(
-                            keyboard=[[KeyboardButton(text="📝 Записать приём пищи")]],
-                            resize_keyboard=True
-                        )
-                    )
-                    logger.info(f"Reminder sent to user {user['id']}")
-                except Exception as e:
-                    logger.error(f"Failed to send reminder to user {user['id']}: {e}")
+        # Соединение не держим, пока идет рассылка
+        user_ids = await get_all_user_ids()
+        logger.info(f"Found {len(user_ids)} users to send reminders")
+        for user_id in user_ids:
+            try:
+                await bot.send_message(
+                    user_id,
+                    "Небольшое напоминание 🌿\n\n"
+                    "Если вдруг почувствуешь, что хочется записать, как ты себя сегодня ощущаешь — это может помочь общему процессу. Всё по желанию, никакой спешки и обязательств.\n\n"
+                    "Твоё участие для нас действительно важно. Каждый из нас — часть чего-то большего. Спасибо, что ты уделяешь время и делишься чувствами.",
+                    reply_markup=MEAL_KB
+                )
+                logger.info(f"Reminder sent to user {user_id}")
+            except Exception as e:
+                logger.error(f"Failed to send reminder to user {user_id}: {e}")
     except Exception as e:
         logger.error(f"Error in daily reminder: {e}")
 
@@ -5,6 +5,8 @@ import asyncio
 import ssl
 import os
 import logging
+import time
+from contextlib import asynccontextmanager
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
@@ -18,38 +20,223 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in environment variables")
 
-url = urlparse(DATABASE_URL)
-
 # SSL конфигурация для Railway PostgreSQL
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
+# Для локальной базы (например, для бенчмарков) SSL можно отключить: DATABASE_SSL=disable
+if os.getenv("DATABASE_SSL") == "disable":
+    ssl_context = False
+
+INTERACTIVE = "interactive"  # запросы обработчиков дневника
+ANALYTICS = "analytics"      # выгрузки, рассылки и прочие тяжелые задачи
+
+# Настройки именованных пулов. Аналитический пул может смотреть на реплику
+# (ANALYTICS_DATABASE_URL), открывает соединения только по требованию и работает
+# в режиме только чтения, поэтому выгрузки не забирают соединения у бота.
+POOL_SETTINGS = {
+    INTERACTIVE: {
+        "dsn": DATABASE_URL,
+        "min_size": 1,
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "command_timeout": 60,
+        "statement_timeout": os.getenv("DB_STATEMENT_TIMEOUT", "60000"),
+        "read_only": False,
+    },
+    ANALYTICS: {
+        "dsn": os.getenv("ANALYTICS_DATABASE_URL") or DATABASE_URL,
+        "min_size": 0,
+        "max_size": int(os.getenv("ANALYTICS_POOL_MAX_SIZE", "2")),
+        "command_timeout": 900,
+        "statement_timeout": os.getenv("ANALYTICS_STATEMENT_TIMEOUT", "600000"),
+        "read_only": True,
+    },
+}
+
+# Запросы вынесены в константы, чтобы benchmark.py мог снять по ним EXPLAIN
+GET_USER_SQL = "SELECT name, gender FROM users WHERE id = $1"
+
+INSERT_ENTRY_SQL = """
+    INSERT INTO entries (
+        user_id, hunger_before, satiety_after, emotion,
+        sleep_hours, location, company, phone, binge_eating
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+"""
+
+# CTE выполняется вместе с основным INSERT — один запрос к базе
+INSERT_ENTRY_WITH_CYCLE_DAY_SQL = """
+    WITH cycle AS (
+        INSERT INTO cycle_days (user_id, cycle_day)
+        VALUES ($1, $10)
+    )
+    INSERT INTO entries (
+        user_id, hunger_before, satiety_after, emotion,
+        sleep_hours, location, company, phone, binge_eating
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+"""
+
+SAVE_CYCLE_DAY_SQL = """
+    INSERT INTO cycle_days (user_id, cycle_day)
+    VALUES ($1, $2)
+"""
+
+USER_ENTRIES_SQL = """
+    SELECT * FROM entries 
+    WHERE user_id = $1 
+    ORDER BY created_at DESC 
+    LIMIT $2
+"""
+
+LAST_CYCLE_DAY_SQL = """
+    SELECT cycle_day 
+    FROM cycle_days 
+    WHERE user_id = $1 
+    AND DATE(created_at) = CURRENT_DATE
+    ORDER BY created_at DESC 
+    LIMIT 1
+"""
+
+# id — первичный ключ, DISTINCT не нужен
+ALL_USER_IDS_SQL = "SELECT id FROM users"
+
+EXPORT_USERS_SQL = "SELECT * FROM users"
+
+EXPORT_ENTRIES_SQL = """
+    SELECT e.*, u.name 
+    FROM entries e 
+    JOIN users u ON e.user_id = u.id 
+"""
+
+# Выгрузка для анализа: к записи добавляется день цикла, указанный в тот же день
+EXPORT_DIARY_SQL = """
+    SELECT 
+        e.created_at AS "timestamp",
+        e.user_id,
+        u.name,
+        u.gender,
+        e.hunger_before,
+        e.satiety_after,
+        e.emotion,
+        e.sleep_hours,
+        e.location,
+        e.company,
+        e.phone,
+        c.cycle_day,
+        e.binge_eating
+    FROM entries e
+    LEFT JOIN users u ON u.id = e.user_id
+    LEFT JOIN (
+        -- Последний день цикла за каждую дату: один проход по cycle_days
+        SELECT DISTINCT ON (user_id, DATE(created_at))
+            user_id,
+            DATE(created_at) AS day,
+            cycle_day
+        FROM cycle_days
+        ORDER BY user_id, DATE(created_at), created_at DESC
+    ) c ON c.user_id = e.user_id AND c.day = DATE(e.created_at)
+    ORDER BY e.created_at DESC
+"""
+
+class TrackedPool:
+    """Пул соединений asyncpg со статистикой ожидания свободного соединения"""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.acquired = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started = time.perf_counter()
+        waiting = True
+        try:
+            async with self.pool.acquire() as conn:
+                waited = (time.perf_counter() - started) * 1000
+                self.waiting -= 1
+                waiting = False
+                self.acquired += 1
+                self.wait_ms_total += waited
+                self.wait_ms_max = max(self.wait_ms_max, waited)
+                yield conn
+        finally:
+            if waiting:
+                self.waiting -= 1
+
+    def stats(self):
+        size = self.pool.get_size()
+        in_use = size - self.pool.get_idle_size()
+        max_size = self.pool.get_max_size()
+        return {
+            "size": size,
+            "in_use": in_use,
+            "max_size": max_size,
+            "saturation": round(in_use / max_size, 2),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "acquired": self.acquired,
+            "wait_ms_avg": round(self.wait_ms_total / self.acquired, 3) if self.acquired else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+        }
+
+    async def close(self):
+        await self.pool.close()
+
+_pools = {}  # именованные пулы соединений
+_pools_lock = None
+_pools_lock_loop = None
 
-_pool = None  # глобальный пул соединений
+def _get_pools_lock():
+    """Блокировка создания пулов для текущего event loop.
+
+    analyze.py вызывает asyncio.run на каждую выгрузку, поэтому при смене
+    loop блокировка создается заново.
+    """
+    global _pools_lock, _pools_lock_loop
+    loop = asyncio.get_running_loop()
+    if _pools_lock is None or _pools_lock_loop is not loop:
+        _pools_lock = asyncio.Lock()
+        _pools_lock_loop = loop
+    return _pools_lock
+
+async def create_pool(name):
+    """Создание именованного пула по настройкам из POOL_SETTINGS"""
+    settings = POOL_SETTINGS[name]
+    url = urlparse(settings["dsn"])
+    server_settings = {
+        'jit': 'off',  # Отключаем JIT для стабильности
+        'statement_timeout': settings["statement_timeout"],
+        'application_name': f"emotion_bot_{name}",
+    }
+    if settings["read_only"]:
+        server_settings['default_transaction_read_only'] = 'on'
+    pool = await asyncpg.create_pool(
+        user=url.username,
+        password=url.password,
+        host=url.hostname,
+        port=url.port,
+        database=url.path[1:],
+        ssl=ssl_context,
+        min_size=settings["min_size"],
+        max_size=settings["max_size"],
+        command_timeout=settings["command_timeout"],
+        server_settings=server_settings
+    )
+    logger.info(f"Database pool '{name}' created successfully")
+    return TrackedPool(name, pool)
 
 async def init_db():
-    """Инициализация базы данных и создание пула соединений"""
+    """Инициализация базы данных и создание интерактивного пула соединений"""
     logger.info("Initializing database...")
-    global _pool
     
-    if _pool is None:
+    if INTERACTIVE not in _pools:
         try:
-            # Создаем пул соединений
-            _pool = await asyncpg.create_pool(
-                user=url.username,
-                password=url.password,
-                host=url.hostname,
-                port=url.port,
-                database=url.path[1:],
-                ssl=ssl_context,
-                min_size=1,      # Минимум соединений
-                max_size=10,     # Максимум соединений
-                command_timeout=60,
-                server_settings={
-                    'jit': 'off'  # Отключаем JIT для стабильности
-                }
-            )
-            logger.info("Database pool created successfully")
+            _pools[INTERACTIVE] = await create_pool(INTERACTIVE)
             
             # Создаем таблицы
             await create_tables()
@@ -61,12 +248,24 @@ async def init_db():
     else:
         logger.info("Database already initialized")
 
-async def get_pool():
-    """Получение пула соединений"""
-    if _pool is None:
+async def get_pool(name=INTERACTIVE):
+    """Получение пула соединений по имени.
+
+    Интерактивный пул создается в init_db(), остальные — при первом обращении.
+    """
+    if name in _pools:
+        return _pools[name]
+    if name == INTERACTIVE:
         logger.error("Database not initialized. Call init_db() first.")
         raise RuntimeError("Database not initialized")
-    return _pool
+    async with _get_pools_lock():
+        if name not in _pools:
+            _pools[name] = await create_pool(name)
+    return _pools[name]
+
+def get_pool_stats():
+    """Статистика загрузки всех открытых пулов"""
+    return {name: pool.stats() for name, pool in _pools.items()}
 
 async def create_tables():
     """Создание таблиц в базе данных"""
@@ -125,6 +324,9 @@ async def create_tables():
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_cycle_days_created_at ON cycle_days(created_at);
             """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_cycle_days_user_id_created_at ON cycle_days(user_id, created_at);
+            """)
             
             logger.info("Tables created successfully")
             
@@ -139,7 +341,7 @@ async def get_user(user_id):
     
     try:
         async with pool.acquire() as conn:
-            row = await conn.fetchrow("SELECT name, gender FROM users WHERE id = $1", user_id)
+            row = await conn.fetchrow(GET_USER_SQL, user_id)
             if row:
                 logger.info(f"User found: {row['name']}, {row['gender']}")
                 return (row["name"], row["gender"])
@@ -178,12 +380,7 @@ async def insert_entry(user_id, data):
     
     try:
         async with pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO entries (
-                    user_id, hunger_before, satiety_after, emotion,
-                    sleep_hours, location, company, phone, binge_eating
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            """, 
+            await conn.execute(INSERT_ENTRY_SQL, 
                 user_id,
                 data.get("hunger_before"),
                 data.get("satiety_after"),
@@ -200,6 +397,31 @@ async def insert_entry(user_id, data):
         logger.error(f"Error inserting entry: {e}")
         raise
 
+async def insert_entry_with_cycle_day(user_id, data, cycle_day):
+    """Вставка записи о приеме пищи и дня цикла одним запросом"""
+    logger.info(f"Inserting entry with cycle day for user_id: {user_id}")
+    pool = await get_pool()
+    
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute(INSERT_ENTRY_WITH_CYCLE_DAY_SQL, 
+                user_id,
+                data.get("hunger_before"),
+                data.get("satiety_after"),
+                data.get("emotion"),
+                data.get("sleep_hours"),
+                data.get("location"),
+                data.get("company"),
+                data.get("phone"),
+                data.get("binge_eating"),
+                cycle_day
+            )
+            logger.info("Entry with cycle day inserted successfully")
+            
+    except Exception as e:
+        logger.error(f"Error inserting entry with cycle day: {e}")
+        raise
+
 async def get_user_entries(user_id, limit=10):
     """Получение записей пользователя"""
     logger.info(f"Getting entries for user_id: {user_id}")
@@ -207,12 +429,7 @@ async def get_user_entries(user_id, limit=10):
     
     try:
         async with pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM entries 
-                WHERE user_id = $1 
-                ORDER BY created_at DESC 
-                LIMIT $2
-            """, user_id, limit)
+            rows = await conn.fetch(USER_ENTRIES_SQL, user_id, limit)
             return [dict(row) for row in rows]
             
     except Exception as e:
@@ -226,14 +443,7 @@ async def get_last_cycle_day(user_id):
     
     try:
         async with pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT cycle_day 
-                FROM cycle_days 
-                WHERE user_id = $1 
-                AND DATE(created_at) = CURRENT_DATE
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """, user_id)
+            row = await conn.fetchrow(LAST_CYCLE_DAY_SQL, user_id)
             return row['cycle_day'] if row else None
             
     except Exception as e:
@@ -247,24 +457,76 @@ async def save_cycle_day(user_id, cycle_day):
     
     try:
         async with pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO cycle_days (user_id, cycle_day)
-                VALUES ($1, $2)
-            """, user_id, cycle_day)
+            await conn.execute(SAVE_CYCLE_DAY_SQL, user_id, cycle_day)
             logger.info("Cycle day saved successfully")
             
     except Exception as e:
         logger.error(f"Error saving cycle day: {e}")
         raise
 
+async def get_all_user_ids():
+    """Получение id всех пользователей (для рассылки напоминаний)"""
+    logger.info("Getting all user ids")
+    pool = await get_pool(ANALYTICS)
+    
+    try:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(ALL_USER_IDS_SQL)
+            return [row["id"] for row in rows]
+            
+    except Exception as e:
+        logger.error(f"Error getting user ids: {e}")
+        raise
+
+async def export_users():
+    """Выгрузка всех пользователей"""
+    logger.info("Exporting users")
+    pool = await get_pool(ANALYTICS)
+    
+    try:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(EXPORT_USERS_SQL)
+            return [dict(row) for row in rows]
+            
+    except Exception as e:
+        logger.error(f"Error exporting users: {e}")
+        raise
+
+async def export_entries():
+    """Выгрузка всех записей с именами пользователей"""
+    logger.info("Exporting entries")
+    pool = await get_pool(ANALYTICS)
+    
+    try:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(EXPORT_ENTRIES_SQL)
+            return [dict(row) for row in rows]
+            
+    except Exception as e:
+        logger.error(f"Error exporting entries: {e}")
+        raise
+
+async def export_diary():
+    """Выгрузка дневника для анализа: записи, данные пользователя и день цикла"""
+    logger.info("Exporting diary")
+    pool = await get_pool(ANALYTICS)
+    
+    try:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(EXPORT_DIARY_SQL)
+            return [dict(row) for row in rows]
+            
+    except Exception as e:
+        logger.error(f"Error exporting diary: {e}")
+        raise
+
 async def close_db():
-    """Закрытие пула соединений (вызывается при завершении приложения)"""
-    global _pool
-    if _pool:
-        logger.info("Closing database pool...")
-        await _pool.close()
-        _pool = None
-        logger.info("Database pool closed")
+    """Закрытие пулов соединений (вызывается при завершении приложения)"""
+    for name, pool in list(_pools.items()):
+        logger.info(f"Closing database pool '{name}', stats: {pool.stats()}")
+        await pool.close()
+        del _pools[name]
+        logger.info(f"Database pool '{name}' closed")
 
 # Функция для тестирования подключения
 async def test_connection():
@@ -0,0 +1,172 @@
+# emotion_bot/generate_data.py
+# Генерация синтетических пользователей, записей и дней цикла в локальную базу
+#
+# Пример:
+#   BENCH_DATABASE_URL=postgresql://postgres@localhost/bench \
+#   python emotion_bot/generate_data.py --users 100000 --entries 5000000 --truncate
+#
+# Основная база (DATABASE_URL) не используется никогда: адрес берется только
+# из --dsn или BENCH_DATABASE_URL.
+
+import argparse
+import asyncio
+import os
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+
+from vocabulary import (
+    EMOTIONS, LOCATIONS, COMPANY_OPTIONS, PHONE_OPTIONS, BINGE_OPTIONS
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+USER_ID_BASE = 10**9
+
+ENTRY_COLUMNS = [
+    "user_id", "hunger_before", "satiety_after", "emotion", "sleep_hours",
+    "location", "company", "phone", "binge_eating", "created_at"
+]
+
+# Срывы и переедания встречаются реже обычных приёмов пищи
+BINGE_WEIGHTS = [0.6, 0.2, 0.1, 0.05, 0.05]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Загрузка синтетических данных в локальную базу")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="адрес локальной базы (по умолчанию BENCH_DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=10_000, help="число пользователей")
+    parser.add_argument("--entries", type=int, default=1_000_000, help="число записей о приёмах пищи")
+    parser.add_argument("--days", type=int, default=365, help="глубина истории в днях")
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="показатель Ципфа для числа записей на пользователя (0 — равномерно)")
+    parser.add_argument("--female-share", type=float, default=0.6, help="доля пользовательниц")
+    parser.add_argument("--cycle-rate", type=float, default=0.5,
+                        help="доля дней, в которые пользовательница отмечает день цикла")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="строк в одном COPY")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы перед загрузкой")
+    return parser.parse_args()
+
+def use_bench_database(dsn):
+    """Направляет database.py на локальную базу; вызывать до импорта database"""
+    if not dsn:
+        logger.error("Set BENCH_DATABASE_URL or pass --dsn")
+        sys.exit(1)
+    os.environ["DATABASE_URL"] = dsn
+    # Аналитический пул тоже смотрит в локальную базу, а не на реплику из .env
+    os.environ["ANALYTICS_DATABASE_URL"] = dsn
+    os.environ.setdefault("DATABASE_SSL", "disable")
+
+def build_users(rng, user_ids, female_share, now):
+    genders = np.where(rng.random(len(user_ids)) < female_share, "женский", "мужской")
+    return [
+        (user_id, f"user_{user_id}", gender, now)
+        for user_id, gender in zip(user_ids.tolist(), genders.tolist())
+    ]
+
+def build_entries(rng, user_ids, weights, size, days, now):
+    owners = user_ids[rng.choice(len(user_ids), size=size, p=weights)]
+    sleep = np.clip(np.round(rng.normal(7, 1.5, size) * 2) / 2, 0, 24)
+    offsets = rng.integers(0, days * 86400, size)
+    return list(zip(
+        owners.tolist(),
+        rng.integers(1, 11, size).tolist(),
+        rng.integers(1, 11, size).tolist(),
+        np.array(EMOTIONS)[rng.integers(0, len(EMOTIONS), size)].tolist(),
+        sleep.tolist(),
+        np.array(LOCATIONS)[rng.integers(0, len(LOCATIONS), size)].tolist(),
+        np.array(COMPANY_OPTIONS)[rng.integers(0, len(COMPANY_OPTIONS), size)].tolist(),
+        np.array(PHONE_OPTIONS)[rng.integers(0, len(PHONE_OPTIONS), size)].tolist(),
+        np.array(BINGE_OPTIONS)[rng.choice(len(BINGE_OPTIONS), size=size, p=BINGE_WEIGHTS)].tolist(),
+        [now - timedelta(seconds=offset) for offset in offsets.tolist()],
+    ))
+
+def build_cycle_days(rng, user_id, days, cycle_rate, today):
+    """Дни цикла одной пользовательницы за всю историю"""
+    cycle_length = int(rng.integers(24, 36))
+    offset = int(rng.integers(0, cycle_length))
+    logged = np.flatnonzero(rng.random(days) < cycle_rate)
+    seconds = rng.integers(8 * 3600, 23 * 3600, len(logged))
+    return [
+        (user_id, (offset - day) % cycle_length + 1, today - timedelta(days=day) + timedelta(seconds=second))
+        for day, second in zip(logged.tolist(), seconds.tolist())
+    ]
+
+async def main():
+    args = parse_args()
+    use_bench_database(args.dsn)
+    from database import init_db, get_pool, close_db
+
+    rng = np.random.default_rng(args.seed)
+    now = datetime.now()
+    today = datetime.combine(now.date(), datetime.min.time())
+
+    await init_db()
+    try:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            if args.truncate:
+                logger.info("Truncating tables...")
+                await conn.execute("TRUNCATE entries, cycle_days, users RESTART IDENTITY")
+
+            # Новые id не пересекаются с уже загруженными пользователями
+            max_id = await conn.fetchval("SELECT MAX(id) FROM users")
+            first_id = max(USER_ID_BASE, (max_id or 0) + 1)
+            user_ids = np.arange(first_id, first_id + args.users, dtype=np.int64)
+
+            started = time.perf_counter()
+            users = build_users(rng, user_ids, args.female_share, now)
+            await conn.copy_records_to_table(
+                "users", records=users, columns=["id", "name", "gender", "created_at"]
+            )
+            logger.info(f"Loaded {len(users)} users")
+
+            # Активность по Ципфу: немногие пользователи дают большую часть записей
+            weights = 1.0 / np.arange(1, args.users + 1) ** args.skew
+            weights = rng.permutation(weights / weights.sum())
+            loaded = 0
+            while loaded < args.entries:
+                size = min(args.batch_size, args.entries - loaded)
+                entries = build_entries(rng, user_ids, weights, size, args.days, now)
+                await conn.copy_records_to_table("entries", records=entries, columns=ENTRY_COLUMNS)
+                loaded += size
+                logger.info(f"Loaded {loaded}/{args.entries} entries")
+
+            cycle_days = []
+            cycle_loaded = 0
+            for user_id, _, gender, _ in users:
+                if gender != "женский":
+                    continue
+                cycle_days.extend(build_cycle_days(rng, user_id, args.days, args.cycle_rate, today))
+                if len(cycle_days) >= args.batch_size:
+                    await conn.copy_records_to_table(
+                        "cycle_days", records=cycle_days, columns=["user_id", "cycle_day", "created_at"]
+                    )
+                    cycle_loaded += len(cycle_days)
+                    cycle_days = []
+            if cycle_days:
+                await conn.copy_records_to_table(
+                    "cycle_days", records=cycle_days, columns=["user_id", "cycle_day", "created_at"]
+                )
+                cycle_loaded += len(cycle_days)
+            logger.info(f"Loaded {cycle_loaded} cycle days")
+
+            await conn.execute("ANALYZE users, entries, cycle_days")
+            logger.info(f"Done in {time.perf_counter() - started:.1f}s")
+    finally:
+        await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+# emotion_bot/vocabulary.py
+# Варианты ответов дневника — общие для бота и генератора тестовых данных
+
+EMOTIONS = [
+    "😐 Нейтрально / никаких ярких эмоций",
+    "😊 Радость / удовлетворение / спокойствие",
+    "😢 Грусть / разочарование / одиночество",
+    "😠 Злость / раздражение / обида",
+    "😰 Тревога / беспокойство / паника",
+    "😴 Усталость / опустошение / вялость",
+    "😞 Стыд / вина / самокритика",
+    "🤯 Стресс / давление / перегрузка",
+    "🥱 Скука / апатия / безразличие",
+    "😍 Вдохновение / воодушевление / благодарность"
+]
+LOCATIONS = [
+    "🏠 Дома", "💼 Работа/Учеба",
+    "🍽️ Кафе/Ресторан", "🚶 На ходу",
+    "🚗 В машине", "🏢 В гостях",
+    "🌳 На природе", "📱 Другое"
+]
+COMPANY_OPTIONS = ["один/одна", "с кем-то"]
+PHONE_OPTIONS = ["с телефоном", "без телефона"]
+BINGE_OPTIONS = [
+    "✅ Нет, обычный приём пищи", "⚠️ Лёгкое переедание",
+    "❗ Сильное переедание", "🔥 Срыв/компульсивное переедание",
+    "🤔 Не уверен(а)"
+]